@@ -1,8 +1,12 @@
 from __future__ import absolute_import
 
 import logging
+import os
 import re
 import sys
+import threading
+import time as _time
+from collections import OrderedDict
 from datetime import datetime
 from datetime import time
 from datetime import timedelta
@@ -12,10 +16,28 @@ from functools import partial
 
 
 __version__ = "1.20.2"
-__all__ = ["parse", "search", "findall", "with_pattern"]
+__all__ = [
+    "parse",
+    "search",
+    "findall",
+    "with_pattern",
+    "precompile",
+    "parse_many",
+    "purge",
+]
 
 log = logging.getLogger(__name__)
 
+# The engine used to compile and match the generated expressions. The
+# third-party "regex" module is often faster on complex formats and may be
+# selected by setting PARSE_REGEX_BACKEND=regex in the environment.
+_regex_backend = re
+if os.environ.get("PARSE_REGEX_BACKEND") == "regex":
+    try:
+        import regex as _regex_backend
+    except ImportError:
+        log.debug("PARSE_REGEX_BACKEND=regex but regex is not installed")
+
 
 def with_pattern(pattern, regex_group_count=None):
     r"""Attach a regular expression pattern matcher to a custom type converter
@@ -48,6 +70,20 @@ def with_pattern(pattern, regex_group_count=None):
     return decorator
 
 
+class _KeepChars(dict):
+    """A str.translate() table which deletes all but the given characters."""
+
+    def __init__(self, chars):
+        dict.__init__(self, [(ord(c), c) for c in chars])
+
+    def __missing__(self, key):
+        return None
+
+
+def _digit_tables(chars):
+    return dict([(base, _KeepChars(chars[:base])) for base in range(2, 37)])
+
+
 class int_convert:
     """Convert a string to an integer.
 
@@ -63,6 +99,8 @@ class int_convert:
     """
 
     CHARS = "0123456789abcdefghijklmnopqrstuvwxyz"
+    # the translate tables which strip all but each base's digits
+    TABLES = _digit_tables(CHARS)
 
     def __init__(self, base=None):
         self.base = base
@@ -93,8 +131,21 @@ class int_convert:
                 elif string[number_start + 1] in "xX":
                     base = 16
 
-        chars = int_convert.CHARS[:base]
-        string = re.sub("[^%s]" % chars, "", string.lower())
+        # most numbers are plain digits (perhaps with a base prefix) which
+        # int() takes as they are; only strip other characters if it won't
+        number = string[number_start:]
+        if number.isalnum():
+            try:
+                return sign * int(number, base)
+            except ValueError:
+                pass
+
+        try:
+            string = string.lower().translate(int_convert.TABLES[base])
+        except TypeError:
+            # Python 2 byte strings can't be translated with a mapping
+            chars = int_convert.CHARS[:base]
+            string = re.sub("[^%s]" % chars, "", string.lower())
         return sign * int(string, base)
 
 
@@ -110,6 +161,10 @@ class convert_first:
         return self.converter(string)
 
 
+def float_convert(string, match):
+    return float(string)
+
+
 def percentage(string, match):
     return float(string[:-1]) / 100.0
 
@@ -140,6 +195,16 @@ class FixedTzOffset(tzinfo):
             return NotImplemented
         return self._name == other._name and self._offset == other._offset
 
+    def __ne__(self, other):
+        # python 2 doesn't derive != from ==
+        if not isinstance(other, FixedTzOffset):
+            return NotImplemented
+        return not self == other
+
+    def __hash__(self):
+        # defining __eq__ would otherwise leave instances unhashable
+        return hash((self._name, self._offset))
+
 
 MONTHS_MAP = {
     "Jan": 1,
@@ -173,6 +238,136 @@ TIME_PAT = r"(\d{1,2}:\d{1,2}(:\d{1,2}(\.\d+)?)?)"
 AM_PAT = r"(\s+[AP]M)"
 TZ_PAT = r"(\s+[-+]\d\d?:?\d\d)"
 
+# TIME_PAT for the date layouts, with the hour, minute, second and fraction
+# each captured so the converters can read them straight from the match
+_TIME_PARTS_PAT = r"(\d{1,2}):(\d{1,2})(?::(\d{1,2})(?:\.(\d+))?)?"
+
+
+def _hms(match, n):
+    """Pull the hour, minute, second and microsecond from the _TIME_PARTS_PAT
+    groups starting at group number n.
+    """
+    H, M, S, u = match.group(n, n + 1, n + 2, n + 3)
+    if H is None:
+        return 0, 0, 0, 0
+    # the fraction is read as digits rather than through float() so that
+    # microseconds aren't lost to rounding
+    u = int(u[:6].ljust(6, "0")) if u else 0
+    return int(H), int(M), int(S) if S else 0, u
+
+
+# the current year, and the timestamps at which it starts and ends, for the
+# formats which have no year of their own
+_year = None
+_year_starts = _year_ends = 0
+
+
+def _current_year():
+    global _year, _year_starts, _year_ends
+    # much cheaper than datetime.today() per match; the start is checked too
+    # in case the clock is moved back
+    if not _year_starts <= _time.time() < _year_ends:
+        _year = datetime.today().year
+        _year_starts = _time.mktime((_year, 1, 1, 0, 0, 0, 0, 0, -1))
+        _year_ends = _time.mktime((_year + 1, 1, 1, 0, 0, 0, 0, 0, -1))
+    return _year
+
+
+def _am_pm(H, am):
+    """Move the hour H onto the 24 hour clock given an AM_PAT match."""
+    if am:
+        am = am.strip()
+    if am == "AM" and H == 12:
+        # correction for "12" hour functioning as "0" hour: 12:15 AM = 00:15 by 24 hr clock
+        H -= 12
+    elif am == "PM" and H == 12:
+        # no correction needed: 12PM is midday, 12:00 by 24 hour clock
+        pass
+    elif am == "PM":
+        H += 12
+    return H
+
+
+# the tzinfo for each valid timezone offset seen, keyed on the offset in
+# minutes and the text it was written as, and shared by every datetime with it
+_tz_utc = FixedTzOffset(0, "UTC")
+_tz_cache = {}
+
+
+def _tzinfo(tz):
+    """Turn a TZ_PAT (or "Z") match into a tzinfo, if there is one."""
+    if not tz:
+        return None
+    tz = tz.strip()
+    if tz == "Z":
+        return _tz_utc
+    if tz.isupper():
+        # TODO use the awesome python TZ module?
+        return tz
+
+    sign = tz[0]
+    if ":" in tz:
+        tzh, tzm = tz[1:].split(":")
+    elif len(tz) == 4:  # 'snnn'
+        tzh, tzm = tz[1], tz[2:4]
+    else:
+        tzh, tzm = tz[1:3], tz[3:5]
+    offset = int(tzm) + int(tzh) * 60
+    if sign == "-":
+        offset = -offset
+    key = (offset, tz)
+    if key in _tz_cache:
+        return _tz_cache[key]
+    tzinfo = FixedTzOffset(offset, tz)
+    # datetime rejects anything a day or more away, so don't keep those, and
+    # stop adding once there are _MAXCACHE spellings
+    if -1440 < offset < 1440 and len(_tz_cache) < _MAXCACHE:
+        _tz_cache[key] = tzinfo
+    return tzinfo
+
+
+def _datetime(y, m, d, H, M, S, u, tz):
+    if m.isdigit():
+        m = int(m)
+    else:
+        m = MONTHS_MAP[m]
+    return datetime(y, m, int(d), H, M, S, u, tzinfo=tz)
+
+
+# Parser._handle_field binds these to the group numbers of each date
+# layout with partial.
+
+
+def datetime_convert(string, match, d, m, y, hms, tz=None, am=None):
+    """Convert a date / time match into a datetime instance."""
+    group = match.group
+    H, M, S, u = _hms(match, hms)
+    if am is not None:
+        H = _am_pm(H, group(am))
+    if tz is not None:
+        tz = _tzinfo(group(tz))
+    return _datetime(int(group(y)), group(m), group(d), H, M, S, u, tz)
+
+
+def syslog_convert(string, match, m, d, hms):
+    """Convert a syslog ("ts") match into a datetime instance in the current
+    year.
+    """
+    group = match.group
+    H, M, S = group(hms, hms + 1, hms + 2)
+    if H is None:
+        H = M = S = 0
+    return _datetime(
+        _current_year(), group(m), group(d), int(H), int(M), int(S), 0, None
+    )
+
+
+def time_convert(string, match, hms, am, tz):
+    """Convert a time ("tt") match into a time instance."""
+    H, M, S, u = _hms(match, hms)
+    H = _am_pm(H, match.group(am))
+    return time(H, M, S, u, tzinfo=_tzinfo(match.group(tz)))
+
 
 def date_convert(
     string,
@@ -189,11 +384,15 @@ def date_convert(
 ):
     """Convert the incoming string containing some date / time info into a
     datetime instance.
+
+    This is the converter used by 1.20.2, which took the (zero-based) group
+    indexes of its own date layouts. It's no longer used by Parser but is
+    kept for code, and old pickles, which refer to it.
     """
     groups = match.groups()
     time_only = False
     if mm and dd:
-        y = datetime.today().year
+        y = _current_year()
         m = groups[mm]
         d = groups[dd]
     elif ymd is not None:
@@ -203,10 +402,7 @@ def date_convert(
     elif dmy is not None:
         d, m, y = re.split(r"[-/\s]", groups[dmy])
     elif d_m_y is not None:
-        d, m, y = d_m_y
-        d = groups[d]
-        m = groups[m]
-        y = groups[y]
+        d, m, y = [groups[i] for i in d_m_y]
     else:
         time_only = True
 
@@ -219,76 +415,56 @@ def date_convert(
             H, M, S = t
             if "." in S:
                 S, u = S.split(".")
-                u = int(float("." + u) * 1000000)
+                u = int(u[:6].ljust(6, "0"))
             S = int(S)
         H = int(H)
         M = int(M)
 
     if am is not None:
-        am = groups[am]
-        if am:
-            am = am.strip()
-        if am == "AM" and H == 12:
-            # correction for "12" hour functioning as "0" hour: 12:15 AM = 00:15 by 24 hr clock
-            H -= 12
-        elif am == "PM" and H == 12:
-            # no correction needed: 12PM is midday, 12:00 by 24 hour clock
-            pass
-        elif am == "PM":
-            H += 12
-
+        H = _am_pm(H, groups[am])
     if tz is not None:
-        tz = groups[tz]
-    if tz == "Z":
-        tz = FixedTzOffset(0, "UTC")
-    elif tz:
-        tz = tz.strip()
-        if tz.isupper():
-            # TODO use the awesome python TZ module?
-            pass
-        else:
-            sign = tz[0]
-            if ":" in tz:
-                tzh, tzm = tz[1:].split(":")
-            elif len(tz) == 4:  # 'snnn'
-                tzh, tzm = tz[1], tz[2:4]
-            else:
-                tzh, tzm = tz[1:3], tz[3:5]
-            offset = int(tzm) + int(tzh) * 60
-            if sign == "-":
-                offset = -offset
-            tz = FixedTzOffset(offset, tz)
+        tz = _tzinfo(groups[tz])
 
     if time_only:
-        d = time(H, M, S, u, tzinfo=tz)
-    else:
-        y = int(y)
-        if m.isdigit():
-            m = int(m)
-        else:
-            m = MONTHS_MAP[m]
-        d = int(d)
-        d = datetime(y, m, d, H, M, S, u, tzinfo=tz)
+        return time(H, M, S, u, tzinfo=tz)
+    return _datetime(int(y), m, d, H, M, S, u, tz)
+
+
+class _strf_date_convert:
+    """Convert a string to a date, time or datetime using a strftime format.
+
+    What sort of value the format describes is worked out once, here,
+    rather than for every string converted.
+    """
 
-    return d
+    def __init__(self, type):
+        self.type = type
+        self.is_date = any("%" + x in type for x in "aAwdbBmyYjUW")
+        self.is_time = any("%" + x in type for x in "HIpMSfz")
+        self.has_year = "%y" in type or "%Y" in type
+
+    def __call__(self, string, match):
+        dt = datetime.strptime(string, self.type)
+        if not self.has_year:
+            dt = dt.replace(year=_current_year())
+
+        if self.is_date and self.is_time:
+            return dt
+        elif self.is_date:
+            return dt.date()
+        elif self.is_time:
+            return dt.time()
+        else:
+            raise ValueError("Datetime not a date nor a time?")
 
 
 def strf_date_convert(x, _, type):
-    is_date = any("%" + x in type for x in "aAwdbBmyYjUW")
-    is_time = any("%" + x in type for x in "HIpMSfz")
-
-    dt = datetime.strptime(x, type)
-    if "%y" not in type and "%Y" not in type:  # year not specified
-        dt = dt.replace(year=datetime.today().year)
-
-    if is_date and is_time:
-        return dt
-    elif is_date:
-        return dt.date()
-    elif is_time:
-        return dt.time()
-    else:
-        raise ValueError("Datetime not a date nor a time?")
+    """Convert a string to a date, time or datetime using a strftime format.
+
+    Parser works out what sort of value each format describes once, with
+    _strf_date_convert; this does it for every call.
+    """
+    return _strf_date_convert(type)(x, _)
 
 
 # ref: https://docs.python.org/3/library/datetime.html#strftime-and-strptime-format-codes
@@ -341,12 +517,55 @@ class RepeatedNameError(ValueError):
     pass
 
 
+# runs of letters, which is where nearly all cased characters are found
+LETTERS_RE = re.compile(r"[^\W\d_]+", re.UNICODE)
+
+
+def _uncased_runs(text):
+    """Split text into the runs of characters that have no case (and so are
+    only ever matched by themselves, even case insensitively)."""
+    return [run for run in LETTERS_RE.split(text) if run.lower() == run.upper()]
+
+
+# field names become the keys of every Result's named dict, so intern them to
+# make lookups of them quick (Python 2's intern() won't take unicode, so don't
+# bother there)
+_intern = getattr(sys, "intern", lambda s: s)
+
 # note: {} are handled separately
 REGEX_SAFETY = re.compile(r"([?\\.[\]()*+^$!|])")
+# the same escaping as a translate table, which is much quicker than sub()
+REGEX_ESCAPES = dict([(ord(c), "\\" + c) for c in r"?\.[]()*+^$!|"])
+
+# regex special characters which may be given as a fill character
+FILL_SAFETY = frozenset(r".\+?*[](){}^$|")
 
 # allowed field types
 ALLOWED_TYPES = set(list("nbox%fFegwWdDsSl") + ["t" + c for c in "ieahgcts"])
 
+# int_convert holds no per-match state, so the "d" fields of every Parser
+# can share one instance
+_auto_int_convert = int_convert()
+
+# the pattern, converter and number of groups within the pattern for the
+# types that need nothing from the format spec (the converters are stateless
+# so they're shared)
+TYPE_PATTERNS = {
+    "n": (r"\d{1,3}([,.]\d{3})*", int_convert(10), 1),
+    "b": (r"(0[bB])?[01]+", int_convert(2), 1),
+    "o": (r"(0[oO])?[0-7]+", int_convert(8), 1),
+    "x": (r"(0[xX])?[0-9a-fA-F]+", int_convert(16), 1),
+    "%": (r"\d+(\.\d+)?%", percentage, 1),
+    "f": (r"\d*\.\d+", float_convert, 0),
+    "F": (r"\d*\.\d+", convert_first(Decimal), 0),
+    "e": (r"\d*\.\d+[eE][-+]?\d+|nan|NAN|[-+]?inf|[-+]?INF", float_convert, 0),
+    "g": (
+        r"\d+(\.\d+)?([eE][-+]?\d+)?|nan|NAN|[-+]?inf|[-+]?INF",
+        float_convert,
+        2,
+    ),
+}
+
 
 def extract_format(format, extra_types):
     """Pull apart the format [[fill]align][sign][0][width][.precision][type]"""
@@ -374,6 +593,7 @@ def extract_format(format, extra_types):
         width += format[0]
         format = format[1:]
 
+    precision = None
     if format.startswith("."):
         # Precision isn't needed but we need to capture it so that
         # the ValueError isn't raised.
@@ -395,16 +615,28 @@ def extract_format(format, extra_types):
     ):
         raise ValueError("format spec %r not recognised" % type)
 
-    return locals()
+    return {
+        "fill": fill,
+        "align": align,
+        "zero": zero,
+        "width": width,
+        "precision": precision,
+        "type": type,
+    }
 
 
-PARSE_RE = re.compile(r"({{|}}|{[\w-]*(?:\.[\w-]+|\[[^]]+])*(?::[^}]+)?})")
+# Fields are far more common than escaped braces, so factor out the opening
+# brace and try the field branch first; "{{" can never be a field as a
+# field's second character is never a "{".
+PARSE_RE = re.compile(r"({(?:[\w-]*(?:\.[\w-]+|\[[^]]+])*(?::[^}]+)?}|{)|}})")
 
 
 class Parser(object):
     """Encapsulate a format string that may be used to parse other strings."""
 
-    def __init__(self, format, extra_types=None, case_sensitive=False):
+    def __init__(
+        self, format, extra_types=None, case_sensitive=False, ascii_only=False
+    ):
         # a mapping of a name as in {hello.world} to a regex-group compatible
         # name, like hello__world. It's used to prevent the transformation of
         # name-to-group and group to name to fail subtly, such as in:
@@ -425,54 +657,89 @@ class Parser(object):
             self._re_flags = re.DOTALL
         else:
             self._re_flags = re.IGNORECASE | re.DOTALL
+        # ascii_only is scoped to each field's pattern so that the format's
+        # own text matches (and folds case) just as it otherwise would.
+        # Python 2's re has no ASCII flag as its str patterns are always
+        # ASCII, and re before 3.7 can't scope it so there it has to cover
+        # the whole expression
+        self._ascii_fields = False
+        if ascii_only and hasattr(_regex_backend, "ASCII"):
+            if _regex_backend is not re or sys.version_info >= (3, 7):
+                self._ascii_fields = True
+            else:
+                self._re_flags |= re.ASCII
         self._fixed_fields = []
         self._named_fields = []
         self._group_index = 0
         self._type_conversions = {}
         self._expression = self._generate_expression()
-        self.__search_re = None
-        self.__match_re = None
+        self._search_re = self._compile(self._expression)
+        self._match_re = self._compile(r"\A%s\Z" % self._expression)
+        # re clamps negative pos / endpos to zero where the regex module (like
+        # str.find()) counts them from the end of the string
+        self._clamp_positions = _regex_backend is re
+        # when every group is an unconverted fixed field (eg. "{} - {}") the
+        # match's groups are the result as they stand
+        self._plain_groups = (
+            not self._named_fields
+            and not self._type_conversions
+            and self._fixed_fields == list(range(self._search_re.groups))
+        )
+        # otherwise evaluate_result walks these: each field's result key, its
+        # group number and its type conversion (if any)
+        conversions = self._type_conversions
+        groupindex = self._search_re.groupindex
+        self._named_groups = [
+            (self._group_to_name_map[k], groupindex[k], conversions.get(k))
+            for k in self._named_fields
+        ]
+        self._fixed_groups = [
+            (i, n + 1, conversions.get(n)) for i, n in enumerate(self._fixed_fields)
+        ]
+        # and the nested dict keys of names like 'aaa[bbb][ccc]'
+        self._name_paths = {}
+        for name in self._group_to_name_map.values():
+            if "[" in name:
+                basename = name[: name.find("[")]
+                subkeys = [k[1:-1] for k in re.findall(r"\[[^]]+]", name)]
+                path = [_intern(k) for k in [basename] + subkeys]
+                self._name_paths[name] = path
 
         log.debug("format %r -> %r", format, self._expression)
 
+    def __setstate__(self, state):
+        if "_prefix" not in state:
+            # pickled by an older version, which compiled its expressions on
+            # first use and had none of the state derived from them since
+            self.__init__(
+                state["_format"],
+                state["_extra_types"],
+                case_sensitive=not state["_re_flags"] & re.IGNORECASE,
+            )
+            return
+        self.__dict__.update(state)
+
     def __repr__(self):
         if len(self._format) > 20:
             return "<%s %r>" % (self.__class__.__name__, self._format[:17] + "...")
         return "<%s %r>" % (self.__class__.__name__, self._format)
 
-    @property
-    def _search_re(self):
-        if self.__search_re is None:
-            try:
-                self.__search_re = re.compile(self._expression, self._re_flags)
-            except AssertionError:
-                # access error through sys to keep py3k and backward compat
-                e = str(sys.exc_info()[1])
-                if e.endswith("this version only supports 100 named groups"):
-                    raise TooManyFields(
-                        "sorry, you are attempting to parse too many complex fields"
-                    )
-        return self.__search_re
-
-    @property
-    def _match_re(self):
-        if self.__match_re is None:
-            expression = r"\A%s\Z" % self._expression
-            try:
-                self.__match_re = re.compile(expression, self._re_flags)
-            except AssertionError:
-                # access error through sys to keep py3k and backward compat
-                e = str(sys.exc_info()[1])
-                if e.endswith("this version only supports 100 named groups"):
-                    raise TooManyFields(
-                        "sorry, you are attempting to parse too many complex fields"
-                    )
-            except re.error:
-                raise NotImplementedError(
-                    "Group names (e.g. (?P<name>) can "
-                    "cause failure, as they are not escaped properly: '%s'" % expression
+    def _compile(self, expression):
+        try:
+            return _regex_backend.compile(expression, self._re_flags)
+        except AssertionError:
+            # access error through sys to keep py3k and backward compat
+            e = str(sys.exc_info()[1])
+            if e.endswith("this version only supports 100 named groups"):
+                raise TooManyFields(
+                    "sorry, you are attempting to parse too many complex fields"
                 )
-        return self.__match_re
+            raise
+        except _regex_backend.error:
+            raise NotImplementedError(
+                "Group names (e.g. (?P<name>) can "
+                "cause failure, as they are not escaped properly: '%s'" % expression
+            )
 
     @property
     def named_fields(self):
@@ -491,6 +758,17 @@ class Parser(object):
 
         Return a Result or Match instance or None if there's no match.
         """
+        try:
+            if not string.startswith(self._prefix) or not string.endswith(
+                self._suffix
+            ):
+                return None
+            if self._prefilter and self._prefilter not in string:
+                return None
+        except AttributeError:
+            # not a string; leave the regex to raise its usual TypeError
+            pass
+
         m = self._match_re.match(string)
         if m is None:
             return None
@@ -514,6 +792,14 @@ class Parser(object):
         """
         if endpos is None:
             endpos = len(string)
+        if self._prefilter:
+            if self._clamp_positions:
+                pos, endpos = max(pos, 0), max(endpos, 0)
+            try:
+                if string.find(self._prefilter, pos, endpos) == -1:
+                    return None
+            except AttributeError:
+                pass
         m = self._search_re.search(string, pos, endpos)
         if m is None:
             return None
@@ -537,83 +823,128 @@ class Parser(object):
         """
         if endpos is None:
             endpos = len(string)
-        return ResultIterator(
-            self, string, pos, endpos, evaluate_result=evaluate_result
-        )
+        if self._prefilter:
+            if self._clamp_positions:
+                pos, endpos = max(pos, 0), max(endpos, 0)
+            try:
+                if string.find(self._prefilter, pos, endpos) == -1:
+                    return _iter_results(self, (), evaluate_result)
+            except AttributeError:
+                pass
+        # let the regex engine walk the string rather than searching again
+        # from each match's end (which would also never get past an empty
+        # match)
+        matches = self._search_re.finditer(string, pos, endpos)
+        return _iter_results(self, matches, evaluate_result)
 
     def _expand_named_fields(self, named_fields):
+        if not self._name_paths:
+            return named_fields
+
         result = {}
         for field, value in named_fields.items():
-            # split 'aaa[bbb][ccc]...' into 'aaa' and '[bbb][ccc]...'
-            n = field.find("[")
-            if n == -1:
-                basename, subkeys = field, ""
-            else:
-                basename, subkeys = field[:n], field[n:]
+            path = self._name_paths.get(field)
+            if path is None:
+                result[field] = value
+                continue
 
             # create nested dictionaries {'aaa': {'bbb': {'ccc': ...}}}
             d = result
-            k = basename
-
-            if subkeys:
-                for subkey in re.findall(r"\[[^]]+]", subkeys):
-                    d = d.setdefault(k, {})
-                    k = subkey[1:-1]
+            for k in path[:-1]:
+                d = d.setdefault(k, {})
 
             # assign the value to the last key
-            d[k] = value
+            d[path[-1]] = value
 
         return result
 
     def evaluate_result(self, m):
         """Generate a Result instance for the given regex match object"""
-        # ok, figure the fixed fields we've pulled out and type convert them
-        fixed_fields = list(m.groups())
-        for n in self._fixed_fields:
-            if n in self._type_conversions:
-                fixed_fields[n] = self._type_conversions[n](fixed_fields[n], m)
-        fixed_fields = tuple(fixed_fields[n] for n in self._fixed_fields)
-
-        # grab the named fields, converting where requested
-        groupdict = m.groupdict()
+        if self._plain_groups:
+            span = m.span
+            fixed_fields = m.groups()
+            spans = {i: span(i + 1) for i in range(len(fixed_fields))}
+            return Result(fixed_fields, {}, spans)
+
+        # pull each field's value and span straight out of the match, type
+        # converting where requested, in a single pass over each kind
+        group = m.group
+        span = m.span
+
         named_fields = {}
-        name_map = {}
-        for k in self._named_fields:
-            korig = self._group_to_name_map[k]
-            name_map[korig] = k
-            if k in self._type_conversions:
-                value = self._type_conversions[k](groupdict[k], m)
+        spans = {}
+        for name, n, convert in self._named_groups:
+            if convert is None:
+                named_fields[name] = group(n)
             else:
-                value = groupdict[k]
+                named_fields[name] = convert(group(n), m)
+            spans[name] = span(n)
 
-            named_fields[korig] = value
-
-        # now figure the match spans
-        spans = {n: m.span(name_map[n]) for n in named_fields}
-        spans.update((i, m.span(n + 1)) for i, n in enumerate(self._fixed_fields))
+        fixed_fields = []
+        for i, n, convert in self._fixed_groups:
+            if convert is None:
+                fixed_fields.append(group(n))
+            else:
+                fixed_fields.append(convert(group(n), m))
+            spans[i] = span(n)
 
         # and that's our result
-        return Result(fixed_fields, self._expand_named_fields(named_fields), spans)
-
-    def _regex_replace(self, match):
-        return "\\" + match.group(1)
+        return Result(
+            tuple(fixed_fields), self._expand_named_fields(named_fields), spans
+        )
 
     def _generate_expression(self):
         # turn my _format attribute into the _expression attribute
         e = []
+        # runs of literal text between the fields
+        literals = [""]
+        # indices of the runs holding a lone brace, which isn't escaped and so
+        # may act as a regex quantifier rather than match itself
+        inexact = set()
         for part in PARSE_RE.split(self._format):
             if not part:
                 continue
             elif part == "{{":
                 e.append(r"\{")
+                literals[-1] += "{"
             elif part == "}}":
                 e.append(r"\}")
+                literals[-1] += "}"
             elif part[0] == "{" and part[-1] == "}":
                 # this will be a braces-delimited field to handle
                 e.append(self._handle_field(part))
+                literals.append("")
             else:
                 # just some text to match
-                e.append(REGEX_SAFETY.sub(self._regex_replace, part))
+                try:
+                    e.append(part.translate(REGEX_ESCAPES))
+                except TypeError:
+                    # Python 2 byte strings can't be translated with a mapping
+                    e.append(REGEX_SAFETY.sub(r"\\\1", part))
+                literals[-1] += part
+                if "{" in part or "}" in part:
+                    inexact.add(len(literals) - 1)
+
+        # Any match must contain all of the literal text, so remember the
+        # longest run of it; a substring test is much cheaper than running
+        # the regex against a string that can't possibly match. Cased
+        # characters may match differently when case insensitive.
+        # parse() can also check the text either side of the fields
+        for i in inexact:
+            literals[i] = ""
+        prefix, suffix = literals[0], literals[-1]
+        if self._re_flags & re.IGNORECASE:
+            prefix = LETTERS_RE.split(prefix)[0]
+            suffix = LETTERS_RE.split(suffix)[-1]
+            if prefix.lower() != prefix.upper():
+                prefix = ""
+            if suffix.lower() != suffix.upper():
+                suffix = ""
+            # (joined with a letter so runs can't span a field)
+            literals = _uncased_runs("a".join(literals))
+        self._prefilter = max([""] + literals, key=len)
+        self._prefix, self._suffix = prefix, suffix
+
         return "".join(e)
 
     def _to_group_name(self, field):
@@ -645,12 +976,8 @@ class Parser(object):
 
         # now figure whether this is an anonymous or named field, and whether
         # there's any format specification
-        format = ""
-
-        if ":" in field:
-            name, format = field.split(":", 1)
-        else:
-            name = field
+        name, _, format = field.partition(":")
+        name = _intern(name)
 
         # This *should* be more flexible, but parsing complicated structures
         # out of the string is hard (and not necessarily useful) ... and I'm
@@ -698,39 +1025,9 @@ class Parser(object):
                 regex_group_count = 0
             self._group_index += regex_group_count
             conv[group] = convert_first(type_converter)
-        elif type == "n":
-            s = r"\d{1,3}([,.]\d{3})*"
-            self._group_index += 1
-            conv[group] = int_convert(10)
-        elif type == "b":
-            s = r"(0[bB])?[01]+"
-            conv[group] = int_convert(2)
-            self._group_index += 1
-        elif type == "o":
-            s = r"(0[oO])?[0-7]+"
-            conv[group] = int_convert(8)
-            self._group_index += 1
-        elif type == "x":
-            s = r"(0[xX])?[0-9a-fA-F]+"
-            conv[group] = int_convert(16)
-            self._group_index += 1
-        elif type == "%":
-            s = r"\d+(\.\d+)?%"
-            self._group_index += 1
-            conv[group] = percentage
-        elif type == "f":
-            s = r"\d*\.\d+"
-            conv[group] = convert_first(float)
-        elif type == "F":
-            s = r"\d*\.\d+"
-            conv[group] = convert_first(Decimal)
-        elif type == "e":
-            s = r"\d*\.\d+[eE][-+]?\d+|nan|NAN|[-+]?inf|[-+]?INF"
-            conv[group] = convert_first(float)
-        elif type == "g":
-            s = r"\d+(\.\d+)?([eE][-+]?\d+)?|nan|NAN|[-+]?inf|[-+]?INF"
-            self._group_index += 2
-            conv[group] = convert_first(float)
+        elif type in TYPE_PATTERNS:
+            s, conv[group], group_count = TYPE_PATTERNS[type]
+            self._group_index += group_count
         elif type == "d":
             if format.get("width"):
                 width = r"{1,%s}" % int(format["width"])
@@ -739,60 +1036,85 @@ class Parser(object):
             s = r"\d{w}|[-+ ]?0[xX][0-9a-fA-F]{w}|[-+ ]?0[bB][01]{w}|[-+ ]?0[oO][0-7]{w}".format(
                 w=width
             )
-            conv[group] = int_convert()
             # do not specify number base, determine it automatically
+            conv[group] = _auto_int_convert
         elif any(k in type for k in dt_format_to_regex):
             s = get_regex_for_datetime_format(type)
-            conv[group] = partial(strf_date_convert, type=type)
+            conv[group] = _strf_date_convert(type)
+            # some directives (eg. %z) have optional parts with groups, so
+            # count them rather than keeping a tally by hand
+            self._group_index += self._compile(s).groups
         elif type == "ti":
-            s = r"(\d{4}-\d\d-\d\d)((\s+|T)%s)?(Z|\s*[-+]\d\d:?\d\d)?" % TIME_PAT
-            n = self._group_index
-            conv[group] = partial(date_convert, ymd=n + 1, hms=n + 4, tz=n + 7)
-            self._group_index += 7
+            s = r"(\d{4})-(\d\d)-(\d\d)(?:(?:\s+|T)%s)?(Z|\s*[-+]\d\d:?\d\d)?"
+            s %= _TIME_PARTS_PAT
+            n = self._group_index + 1
+            conv[group] = partial(
+                datetime_convert, y=n + 1, m=n + 2, d=n + 3, hms=n + 4, tz=n + 8
+            )
+            self._group_index += 8
         elif type == "tg":
-            s = r"(\d{1,2}[-/](\d{1,2}|%s)[-/]\d{4})(\s+%s)?%s?%s?"
-            s %= (ALL_MONTHS_PAT, TIME_PAT, AM_PAT, TZ_PAT)
-            n = self._group_index
+            s = r"(\d{1,2})[-/](\d{1,2}|%s)[-/](\d{4})(?:\s+%s)?%s?%s?"
+            s %= (ALL_MONTHS_PAT, _TIME_PARTS_PAT, AM_PAT, TZ_PAT)
+            n = self._group_index + 1
             conv[group] = partial(
-                date_convert, dmy=n + 1, hms=n + 5, am=n + 8, tz=n + 9
+                datetime_convert,
+                d=n + 1,
+                m=n + 2,
+                y=n + 4,
+                hms=n + 5,
+                am=n + 9,
+                tz=n + 10,
             )
-            self._group_index += 9
+            self._group_index += 10
         elif type == "ta":
-            s = r"((\d{1,2}|%s)[-/]\d{1,2}[-/]\d{4})(\s+%s)?%s?%s?"
-            s %= (ALL_MONTHS_PAT, TIME_PAT, AM_PAT, TZ_PAT)
-            n = self._group_index
+            s = r"(\d{1,2}|%s)[-/](\d{1,2})[-/](\d{4})(?:\s+%s)?%s?%s?"
+            s %= (ALL_MONTHS_PAT, _TIME_PARTS_PAT, AM_PAT, TZ_PAT)
+            n = self._group_index + 1
             conv[group] = partial(
-                date_convert, mdy=n + 1, hms=n + 5, am=n + 8, tz=n + 9
+                datetime_convert,
+                m=n + 1,
+                d=n + 3,
+                y=n + 4,
+                hms=n + 5,
+                am=n + 9,
+                tz=n + 10,
             )
-            self._group_index += 9
+            self._group_index += 10
         elif type == "te":
             # this will allow microseconds through if they're present, but meh
-            s = r"(%s,\s+)?(\d{1,2}\s+%s\s+\d{4})\s+%s%s"
-            s %= (DAYS_PAT, MONTHS_PAT, TIME_PAT, TZ_PAT)
-            n = self._group_index
-            conv[group] = partial(date_convert, dmy=n + 3, hms=n + 5, tz=n + 8)
-            self._group_index += 8
+            s = r"(?:%s,\s+)?(\d{1,2})\s+%s\s+(\d{4})\s+%s%s"
+            s %= (DAYS_PAT, MONTHS_PAT, _TIME_PARTS_PAT, TZ_PAT)
+            n = self._group_index + 1
+            conv[group] = partial(
+                datetime_convert, d=n + 2, m=n + 3, y=n + 4, hms=n + 5, tz=n + 9
+            )
+            self._group_index += 9
         elif type == "th":
             # slight flexibility here from the stock Apache format
-            s = r"(\d{1,2}[-/]%s[-/]\d{4}):%s%s" % (MONTHS_PAT, TIME_PAT, TZ_PAT)
-            n = self._group_index
-            conv[group] = partial(date_convert, dmy=n + 1, hms=n + 3, tz=n + 6)
-            self._group_index += 6
+            s = r"(\d{1,2})[-/]%s[-/](\d{4}):%s%s"
+            s %= (MONTHS_PAT, _TIME_PARTS_PAT, TZ_PAT)
+            n = self._group_index + 1
+            conv[group] = partial(
+                datetime_convert, d=n + 1, m=n + 2, y=n + 3, hms=n + 4, tz=n + 8
+            )
+            self._group_index += 8
         elif type == "tc":
-            s = r"(%s)\s+%s\s+(\d{1,2})\s+%s\s+(\d{4})"
-            s %= (DAYS_PAT, MONTHS_PAT, TIME_PAT)
-            n = self._group_index
-            conv[group] = partial(date_convert, d_m_y=(n + 4, n + 3, n + 8), hms=n + 5)
+            s = r"%s\s+%s\s+(\d{1,2})\s+%s\s+(\d{4})"
+            s %= (DAYS_PAT, MONTHS_PAT, _TIME_PARTS_PAT)
+            n = self._group_index + 1
+            conv[group] = partial(
+                datetime_convert, d=n + 3, m=n + 2, y=n + 8, hms=n + 4
+            )
             self._group_index += 8
         elif type == "tt":
-            s = r"%s?%s?%s?" % (TIME_PAT, AM_PAT, TZ_PAT)
-            n = self._group_index
-            conv[group] = partial(date_convert, hms=n + 1, am=n + 4, tz=n + 5)
-            self._group_index += 5
+            s = r"(?:%s)?%s?%s?" % (_TIME_PARTS_PAT, AM_PAT, TZ_PAT)
+            n = self._group_index + 1
+            conv[group] = partial(time_convert, hms=n + 1, am=n + 5, tz=n + 6)
+            self._group_index += 6
         elif type == "ts":
-            s = r"%s(\s+)(\d+)(\s+)(\d{1,2}:\d{1,2}:\d{1,2})?" % MONTHS_PAT
-            n = self._group_index
-            conv[group] = partial(date_convert, mm=n + 1, dd=n + 3, hms=n + 5)
+            s = r"%s\s+(\d+)\s+(?:(\d{1,2}):(\d{1,2}):(\d{1,2}))?" % MONTHS_PAT
+            n = self._group_index + 1
+            conv[group] = partial(syslog_convert, m=n + 1, d=n + 2, hms=n + 3)
             self._group_index += 5
         elif type == "l":
             s = r"[A-Za-z]+"
@@ -810,6 +1132,9 @@ class Parser(object):
 
         align = format["align"]
         fill = format["fill"]
+        # escaped before any use, including as the "=" alignment's padding
+        if fill in FILL_SAFETY:
+            fill = "\\" + fill
 
         # handle some numeric-specific things like fill and sign
         if is_numeric:
@@ -841,9 +1166,6 @@ class Parser(object):
             if not align:
                 align = ">"
 
-        if fill in r".\+?*[](){}^$":
-            fill = "\\" + fill
-
         # align "=" has been handled
         if align == "<":
             s = "%s%s*" % (s, fill)
@@ -852,6 +1174,8 @@ class Parser(object):
         elif align == "^":
             s = "%s*%s%s*" % (fill, s, fill)
 
+        if self._ascii_fields:
+            s = "(?a:%s)" % s
         return s
 
 
@@ -866,11 +1190,24 @@ class Result(object):
     Named results may be tested for existence using `'name' in result`.
     """
 
+    # one of these is created per match so keep them small
+    __slots__ = ("fixed", "named", "spans")
+
     def __init__(self, fixed, named, spans):
         self.fixed = fixed
         self.named = named
         self.spans = spans
 
+    # slotted classes need these to pickle with the old protocols
+    def __getstate__(self):
+        return self.fixed, self.named, self.spans
+
+    def __setstate__(self, state):
+        if isinstance(state, dict):
+            # pickled before Result had slots, from its instance __dict__
+            state = state["fixed"], state["named"], state["spans"]
+        self.fixed, self.named, self.spans = state
+
     def __getitem__(self, item):
         if isinstance(item, (int, slice)):
             return self.fixed[item]
@@ -890,6 +1227,8 @@ class Match(object):
     to the user and use them for external Parser.evaluate_result calls.
     """
 
+    __slots__ = ("parser", "match")
+
     def __init__(self, parser, match):
         self.parser = parser
         self.match = match
@@ -899,38 +1238,96 @@ class Match(object):
         return self.parser.evaluate_result(self.match)
 
 
-class ResultIterator(object):
-    """The result of a findall() operation.
+def _parse_results(parser, strings, evaluate_result):
+    """Generate the results of a parse_many() operation.
 
-    Each element is a Result instance.
+    Each element is a Result instance, or a Match if evaluate_result is false.
     """
+    parse_string = parser.parse
+    for string in strings:
+        result = parse_string(string, evaluate_result)
+        if result is not None:
+            yield result
 
-    def __init__(self, parser, string, pos, endpos, evaluate_result=True):
-        self.parser = parser
-        self.string = string
-        self.pos = pos
-        self.endpos = endpos
-        self.evaluate_result = evaluate_result
-
-    def __iter__(self):
-        return self
-
-    def __next__(self):
-        m = self.parser._search_re.search(self.string, self.pos, self.endpos)
-        if m is None:
-            raise StopIteration()
-        self.pos = m.end()
-
-        if self.evaluate_result:
-            return self.parser.evaluate_result(m)
-        else:
-            return Match(self.parser, m)
 
-    # pre-py3k compat
-    next = __next__
+def _iter_results(parser, matches, evaluate_result):
+    """Generate the results of a findall() operation.
 
-
-def parse(format, string, extra_types=None, evaluate_result=True, case_sensitive=False):
+    Each element is a Result instance, or a Match if evaluate_result is false.
+    """
+    if evaluate_result:
+        evaluate = parser.evaluate_result
+        for m in matches:
+            yield evaluate(m)
+    else:
+        for m in matches:
+            yield Match(parser, m)
+
+
+# Parsers built by the module-level functions, so that calling them with the
+# same format again (eg. in a loop) doesn't regenerate and recompile the
+# expression every time. The least recently used are dropped once there are
+# _MAXCACHE of them.
+_parser_cache = OrderedDict()
+_parser_cache_lock = threading.Lock()
+_MAXCACHE = 1000
+
+
+def _get_parser(format, extra_types, case_sensitive, ascii_only):
+    try:
+        # note: converters are keyed by identity, like the format itself
+        # their pattern attribute should not be changed once they're used
+        key = (
+            format,
+            frozenset(extra_types.items()) if extra_types else None,
+            case_sensitive,
+            ascii_only,
+        )
+        p = _parser_cache.get(key)
+    except TypeError:
+        # some custom type converter is unhashable, so skip the cache
+        key = p = None
+
+    if p is not None:
+        try:
+            _parser_cache.move_to_end(key)
+        except KeyError:
+            # another thread has just dropped it
+            pass
+        except AttributeError:
+            # Python 2's OrderedDict can only move a key by reinserting it
+            with _parser_cache_lock:
+                if key in _parser_cache:
+                    _parser_cache[key] = _parser_cache.pop(key)
+        return p
+
+    p = Parser(
+        format,
+        extra_types=extra_types,
+        case_sensitive=case_sensitive,
+        ascii_only=ascii_only,
+    )
+    if key is not None:
+        with _parser_cache_lock:
+            _parser_cache[key] = p
+            if len(_parser_cache) > _MAXCACHE:
+                _parser_cache.popitem(last=False)
+    return p
+
+
+def purge():
+    """Clear the cache of compiled formats."""
+    _parser_cache.clear()
+
+
+def parse(
+    format,
+    string,
+    extra_types=None,
+    evaluate_result=True,
+    case_sensitive=False,
+    ascii_only=False,
+):
     """Using "format" attempt to pull values from "string".
 
     The format must match the string contents exactly. If the value
@@ -950,13 +1347,17 @@ def parse(format, string, extra_types=None, evaluate_result=True, case_sensitive
     The default behaviour is to match strings case insensitively. You may match with
     case by specifying case_sensitive=True.
 
+    Field types such as "d" and "w" match any Unicode digit or word character.
+    Specifying ascii_only=True restricts them to ASCII, which is quicker;
+    the format's own text is matched as usual.
+
     If the format is invalid a ValueError will be raised.
 
     See the module documentation for the use of "extra_types".
 
     In the case there is no match parse() will return None.
     """
-    p = Parser(format, extra_types=extra_types, case_sensitive=case_sensitive)
+    p = _get_parser(format, extra_types, case_sensitive, ascii_only)
     return p.parse(string, evaluate_result=evaluate_result)
 
 
@@ -968,6 +1369,7 @@ def search(
     extra_types=None,
     evaluate_result=True,
     case_sensitive=False,
+    ascii_only=False,
 ):
     """Search "string" for the first occurrence of "format".
 
@@ -991,13 +1393,17 @@ def search(
     The default behaviour is to match strings case insensitively. You may match with
     case by specifying case_sensitive=True.
 
+    Field types such as "d" and "w" match any Unicode digit or word character.
+    Specifying ascii_only=True restricts them to ASCII, which is quicker;
+    the format's own text is matched as usual.
+
     If the format is invalid a ValueError will be raised.
 
     See the module documentation for the use of "extra_types".
 
     In the case there is no match parse() will return None.
     """
-    p = Parser(format, extra_types=extra_types, case_sensitive=case_sensitive)
+    p = _get_parser(format, extra_types, case_sensitive, ascii_only)
     return p.search(string, pos, endpos, evaluate_result=evaluate_result)
 
 
@@ -1009,6 +1415,7 @@ def findall(
     extra_types=None,
     evaluate_result=True,
     case_sensitive=False,
+    ascii_only=False,
 ):
     """Search "string" for all occurrences of "format".
 
@@ -1031,15 +1438,44 @@ def findall(
     The default behaviour is to match strings case insensitively. You may match with
     case by specifying case_sensitive=True.
 
+    Field types such as "d" and "w" match any Unicode digit or word character.
+    Specifying ascii_only=True restricts them to ASCII, which is quicker;
+    the format's own text is matched as usual.
+
     If the format is invalid a ValueError will be raised.
 
     See the module documentation for the use of "extra_types".
     """
-    p = Parser(format, extra_types=extra_types, case_sensitive=case_sensitive)
+    p = _get_parser(format, extra_types, case_sensitive, ascii_only)
     return p.findall(string, pos, endpos, evaluate_result=evaluate_result)
 
 
-def compile(format, extra_types=None, case_sensitive=False):
+def parse_many(
+    format,
+    strings,
+    extra_types=None,
+    evaluate_result=True,
+    case_sensitive=False,
+    ascii_only=False,
+):
+    """Using "format" attempt to pull values from each of "strings", eg. the
+    lines of a file.
+
+    You will be returned an iterator that holds a Result (or Match, if
+    ``evaluate_result`` is False) for each string that matches the format
+    exactly, as parse() would return. Strings that don't match are skipped.
+
+    This is quicker than calling parse() for each string in turn as the
+    format is only looked up once.
+
+    The other arguments are as for parse().
+    """
+    # look the parser up now so a bad format raises here, not on first next()
+    p = _get_parser(format, extra_types, case_sensitive, ascii_only)
+    return _parse_results(p, strings, evaluate_result)
+
+
+def compile(format, extra_types=None, case_sensitive=False, ascii_only=False):
     """Create a Parser instance to parse "format".
 
     The resultant Parser has a method .parse(string) which
@@ -1048,14 +1484,34 @@ def compile(format, extra_types=None, case_sensitive=False):
     The default behaviour is to match strings case insensitively. You may match with
     case by specifying case_sensitive=True.
 
+    Field types such as "d" and "w" match any Unicode digit or word character.
+    Specifying ascii_only=True restricts them to ASCII, which is quicker;
+    the format's own text is matched as usual.
+
     Use this function if you intend to parse many strings
-    with the same format.
+    with the same format. Parsers are cached by their arguments, so
+    compiling the same format again returns the same Parser.
 
     See the module documentation for the use of "extra_types".
 
     Returns a Parser instance.
     """
-    return Parser(format, extra_types=extra_types, case_sensitive=case_sensitive)
+    return _get_parser(format, extra_types, case_sensitive, ascii_only)
+
+
+def precompile(formats, extra_types=None, case_sensitive=False, ascii_only=False):
+    """Compile a dict of formats, eg. at startup, so that the first use of
+    each doesn't pay for building it.
+
+    The other arguments are as for compile(), and apply to every format.
+
+    Returns a dict mapping the same keys to Parser instances. They are also
+    cached for parse(), search(), findall() and compile().
+    """
+    return dict(
+        (name, _get_parser(format, extra_types, case_sensitive, ascii_only))
+        for name, format in formats.items()
+    )
 
 
 # Copyright (c) 2012-2020 Richard Jones <richard@python.org>
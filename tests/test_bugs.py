@@ -1,5 +1,11 @@
+# coding: utf-8
 import pickle
+import re
+import sys
 from datetime import datetime
+from datetime import time
+
+import pytest
 
 import parse
 
@@ -79,6 +85,94 @@ def test_pickling_bug_110():
     pickle.dumps(p)
 
 
+@pytest.mark.skipif(sys.version_info[0] < 3, reason="pickled re.RegexFlag")
+def test_unpickle_parser_from_1_20():
+    # compile("{} {n:d}") pickled by parse 1.20.2, before the Parser compiled
+    # its expressions up front
+    data = (
+        b"\x80\x02cparse\nParser\nq\x00)\x81q\x01}q\x02(X\x12\x00\x00\x00_group_"
+        b"to_name_mapq\x03}q\x04X\x01\x00\x00\x00nq\x05h\x05sX\x12\x00\x00\x00_n"
+        b"ame_to_group_mapq\x06}q\x07h\x05h\x05sX\x0b\x00\x00\x00_name_typesq"
+        b"\x08}q\th\x05X\x01\x00\x00\x00dq\nsX\x07\x00\x00\x00_formatq\x0bX\x08"
+        b"\x00\x00\x00{} {n:d}q\x0cX\x0c\x00\x00\x00_extra_typesq\r}q\x0eX\t\x00"
+        b"\x00\x00_re_flagsq\x0fcre\nRegexFlag\nq\x10K\x12\x85q\x11Rq\x12X\r\x00"
+        b"\x00\x00_fixed_fieldsq\x13]q\x14K\x00aX\r\x00\x00\x00_named_fieldsq"
+        b"\x15]q\x16h\x05aX\x0c\x00\x00\x00_group_indexq\x17K\x02X\x11\x00\x00"
+        b"\x00_type_conversionsq\x18}q\x19h\x05cparse\nint_convert\nq\x1a)\x81q"
+        b"\x1b}q\x1cX\x04\x00\x00\x00baseq\x1dNsbsX\x0b\x00\x00\x00_expressionq"
+        b"\x1eXQ\x00\x00\x00(.+?) (?P<n>[-+ ]?\\d+|[-+ ]?0[xX][0-9a-fA-F]+|[-+ ]"
+        b"?0[bB][01]+|[-+ ]?0[oO][0-7]+)q\x1fX\x12\x00\x00\x00_Parser__search_re"
+        b"q NX\x11\x00\x00\x00_Parser__match_req!Nub."
+    )
+    p = pickle.loads(data)
+    r = p.parse("a 1")
+    assert r.fixed == ("a",)
+    assert r.named == {"n": 1}
+    assert p.search("x a 2")["n"] == 2
+    assert pickle.loads(pickle.dumps(p)).parse("A 3")["n"] == 3
+
+    # and compile("{when:ti} {:d}"), whose date field was converted by a
+    # partial of the since removed date_convert
+    data = (
+        b"\x80\x02cparse\nParser\nq\x00)\x81q\x01}q\x02(X\x12\x00\x00\x00_grou"
+        b"p_to_name_mapq\x03}q\x04X\x04\x00\x00\x00whenq\x05h\x05sX\x12\x00"
+        b"\x00\x00_name_to_group_mapq\x06}q\x07h\x05h\x05sX\x0b\x00\x00\x00_na"
+        b"me_typesq\x08}q\th\x05X\x02\x00\x00\x00tiq\nsX\x07\x00\x00\x00_forma"
+        b"tq\x0bX\x0e\x00\x00\x00{when:ti} {:d}q\x0cX\x0c\x00\x00\x00_extra_ty"
+        b"pesq\r}q\x0eX\t\x00\x00\x00_re_flagsq\x0fcre\nRegexFlag\nq\x10K\x12"
+        b"\x85q\x11Rq\x12X\r\x00\x00\x00_fixed_fieldsq\x13]q\x14K\x08aX\r\x00"
+        b"\x00\x00_named_fieldsq\x15]q\x16h\x05aX\x0c\x00\x00\x00_group_indexq"
+        b"\x17K\tX\x11\x00\x00\x00_type_conversionsq\x18}q\x19(h\x05cfunctools"
+        b"\npartial\nq\x1acparse\ndate_convert\nq\x1b\x85q\x1cRq\x1d(h\x1b)}q"
+        b"\x1e(X\x03\x00\x00\x00ymdq\x1fK\x01X\x03\x00\x00\x00hmsq K\x04X\x02"
+        b'\x00\x00\x00tzq!K\x07uNtq"bK\x08cparse\nint_convert\nq#)\x81q$}q%X'
+        b"\x04\x00\x00\x00baseq&NsbuX\x0b\x00\x00\x00_expressionq'X\xa6\x00"
+        b"\x00\x00(?P<when>(\\d{4}-\\d\\d-\\d\\d)((\\s+|T)(\\d{1,2}:\\d{1,2}(:"
+        b"\\d{1,2}(\\.\\d+)?)?))?(Z|\\s*[-+]\\d\\d:?\\d\\d)?) ([-+ ]?\\d+|[-+ "
+        b"]?0[xX][0-9a-fA-F]+|[-+ ]?0[bB][01]+|[-+ ]?0[oO][0-7]+)q(X\x12\x00"
+        b"\x00\x00_Parser__search_req)NX\x11\x00\x00\x00_Parser__match_req*Nub"
+        b"."
+    )
+    p = pickle.loads(data)
+    r = p.parse("2024-03-05 10:20:30+01:00 7")
+    assert r.fixed == (7,)
+    assert r["when"] == datetime(
+        2024, 3, 5, 10, 20, 30, tzinfo=parse.FixedTzOffset(60, "+01:00")
+    )
+    assert pickle.loads(pickle.dumps(p)).parse("2024-03-05 1")["when"] == (
+        datetime(2024, 3, 5)
+    )
+
+
+def test_date_convert_from_1_20():
+    # date_convert still takes the group indexes of 1.20.2's date layouts
+    m = re.match(
+        r"(\d{4}-\d\d-\d\d)(?:\s+(\d{1,2}:\d{1,2}(?::\d{1,2}(?:\.\d+)?)?))?"
+        r"(\s*[-+]\d\d:?\d\d)?",
+        "2024-03-05 10:20:30.5 +01:00",
+    )
+    assert parse.date_convert(m.group(), m, ymd=0, hms=1, tz=2) == datetime(
+        2024, 3, 5, 10, 20, 30, 500000, tzinfo=parse.FixedTzOffset(60, "+01:00")
+    )
+    m = re.match(r"(\d+) (\w+) (\d+) (\d+:\d+)( [AP]M)", "5 Mar 2024 12:15 AM")
+    r = parse.date_convert(m.group(), m, d_m_y=(0, 1, 2), hms=3, am=4)
+    assert r == datetime(2024, 3, 5, 0, 15)
+    m = re.match(r"(\d+:\d+)", "10:20")
+    assert parse.date_convert(m.group(), m, hms=0) == time(10, 20)
+
+
+def test_time_pat_groups_unchanged():
+    # TIME_PAT is public and may be embedded in other expressions
+    assert re.compile(parse.TIME_PAT).groups == 3
+
+
+def test_strf_date_convert_from_1_20():
+    assert parse.strf_date_convert("2024-03-05", None, type="%Y-%m-%d") == (
+        datetime(2024, 3, 5).date()
+    )
+    assert parse.strf_date_convert("10:20", None, type="%H:%M") == time(10, 20)
+
+
 def test_unused_centered_alignment_bug():
     r = parse.parse("{:^2S}", "foo")
     assert r[0] == "foo"
@@ -101,3 +195,43 @@ def test_unused_left_alignment_bug():
 def test_match_trailing_newline():
     r = parse.parse("{}", "test\n")
     assert r[0] == "test\n"
+
+
+@pytest.mark.skipif(
+    sys.version_info[0] < 3, reason="Python 3+ required for timezone support"
+)
+def test_strftime_groups_dont_shift_later_fields():
+    # %z contains groups of its own which were not being counted
+    r = parse.parse("{:%H:%M%z} {}", "10:30+0100 spam")
+    assert r[1] == "spam"
+
+
+def test_regex_special_fill_characters():
+    assert parse.parse("{:|<}x", "ab|||x")[0] == "ab"
+    assert parse.parse("{:*=5d}", "**123")[0] == 123
+    assert parse.parse("{:.=5d}", "..123")[0] == 123
+    assert parse.parse("{:.=5d}", "ab123") is None
+
+
+def test_flexible_time_microseconds_are_exact():
+    # the fraction used to go through float() and could lose a microsecond
+    r = parse.parse("{:ti}", "2023-11-21 13:23:27.000249")
+    assert r[0].microsecond == 249
+    assert parse.parse("{:tt}", "13:23:27.1234567")[0].microsecond == 123456
+
+
+@pytest.mark.skipif(
+    sys.version_info[0] < 3, reason="Python 3+ required for Unicode digits"
+)
+def test_unicode_digits_convert():
+    # {:d} matches any Unicode decimal digits but stripping non-ASCII digits
+    # left nothing for int() to convert
+    assert parse.parse("{:d}", "١٢٣")[0] == 123
+
+
+def test_tz_offsets_are_hashable():
+    utc = parse.FixedTzOffset(0, "UTC")
+    assert utc == parse.FixedTzOffset(0, "UTC")
+    assert not utc != parse.FixedTzOffset(0, "UTC")
+    assert utc != parse.FixedTzOffset(60, "+01:00")
+    assert len({utc, parse.FixedTzOffset(0, "UTC")}) == 1
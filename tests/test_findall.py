@@ -1,3 +1,5 @@
+from datetime import time
+
 import parse
 
 
@@ -24,3 +26,9 @@ def test_case_sensitivity():
 
     l = [r.fixed[0] for r in parse.findall("x({})x", "X(hi)X", case_sensitive=True)]
     assert l == []
+
+
+def test_empty_match():
+    # an optional-everything format mustn't get stuck matching nothing
+    l = [r[0] for r in parse.findall("{:tt}", "at 10:30")]
+    assert time(10, 30) in l
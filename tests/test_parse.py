@@ -57,6 +57,19 @@ def test_unicode():
     assert r[0] == "t€ststr"
 
 
+@pytest.mark.skipif(
+    sys.version_info[0] < 3, reason="Python 2 str patterns are always ASCII"
+)
+def test_ascii_only():
+    r = parse.parse("{:w} {:w}", "café crème")
+    assert r.fixed == ("café", "crème")
+    assert parse.parse("{:w} {:w}", "café crème", ascii_only=True) is None
+    r = parse.search("{:w}", "café", ascii_only=True)
+    assert r[0] == "caf"
+    # the format's own text still folds case beyond ASCII
+    assert parse.parse("café {}", "CAFÉ x", ascii_only=True)[0] == "x"
+
+
 def test_hexadecimal():
     # issue42: make sure bare hexadecimal isn't matched as "digits"
     r = parse.parse("{:d}", "abcdef")
@@ -145,6 +158,15 @@ def test_named():
     assert r.named == {"name": "world"}
 
 
+@pytest.mark.skipif(sys.version_info[0] < 3, reason="Python 2 names aren't interned")
+def test_named_keys_interned():
+    # build the name at runtime so that it's not already interned
+    name = "".join(["na", "me"])
+    r = parse.parse("hello {%s} {n[%s]}" % (name, name), "hello world !")
+    assert list(r.named)[0] is sys.intern("name")
+    assert list(r.named["n"])[0] is sys.intern("name")
+
+
 def test_named_repeated():
     # test a name may be repeated
     r = parse.parse("{n} {n}", "x x")
@@ -605,6 +627,66 @@ def test_datetimes():
     y("a {:tt} b", "a 10:21:36 PM -0830 b", time(22, 21, 36, tzinfo=t830))
 
 
+def test_current_year_refreshed(monkeypatch):
+    # the year is cached until the timestamp at which it ends
+    monkeypatch.setattr(parse, "_year", 1999)
+    monkeypatch.setattr(parse, "_year_ends", 0)
+    r = parse.parse("{:ts}", "Nov 21 10:21:36")
+    assert r[0] == datetime(datetime.today().year, 11, 21, 10, 21, 36)
+    assert parse._year_ends > 0
+
+
+def test_current_year_clock_moved_back(monkeypatch):
+    # eg. a VM snapshot being restored, or a frozen clock in tests
+    now = [parse._time.mktime((2030, 6, 1, 0, 0, 0, 0, 0, -1))]
+
+    class clock_datetime(datetime):
+        @classmethod
+        def today(cls):
+            return datetime.fromtimestamp(now[0])
+
+    monkeypatch.setattr(parse._time, "time", lambda: now[0])
+    monkeypatch.setattr(parse, "datetime", clock_datetime)
+    monkeypatch.setattr(parse, "_year_ends", 0)
+    assert parse.parse("{:ts}", "Nov 21 10:21:36")[0].year == 2030
+    now[0] = parse._time.mktime((2020, 6, 1, 0, 0, 0, 0, 0, -1))
+    assert parse.parse("{:ts}", "Nov 21 10:21:36")[0].year == 2020
+    assert parse.parse("{:%b %d}", "Nov 21")[0].year == 2020
+
+
+def test_timezones_shared():
+    a = parse.parse("{:ti}", "2011-11-21 10:21:36 +10:00")[0]
+    b = parse.parse("{:te}", "21 Nov 2011 10:21:36 +10:00")[0]
+    assert a.tzinfo is b.tzinfo
+    assert parse.parse("{:ti}", "2011-11-21 10:21:36Z")[0].tzname() == "UTC"
+
+
+def test_timezone_cache_bounded(monkeypatch):
+    monkeypatch.setattr(parse, "_tz_cache", {})
+    # offsets datetime can't use are converted but not kept
+    r = parse.parse("{:ti}", "2011-11-21 10:21:36 +99:99")[0]
+    assert r.tzinfo == parse.FixedTzOffset(99 * 60 + 99, "+99:99")
+    assert parse._tz_cache == {}
+    a = parse.parse("{:ti}", "2011-11-21 10:21:36 +10:00")[0]
+    b = parse.parse("{:ti}", "2011-11-22 10:21:36 +10:00")[0]
+    assert a.tzinfo is b.tzinfo
+    assert list(parse._tz_cache) == [(600, "+10:00")]
+    monkeypatch.setattr(parse, "_MAXCACHE", 1)
+    parse.parse("{:ti}", "2011-11-21 10:21:36 +11:00")
+    assert list(parse._tz_cache) == [(600, "+10:00")]
+
+
+@pytest.mark.skipif(
+    sys.version_info[0] < 3, reason="Python 2 str patterns are always ASCII"
+)
+def test_timezone_unicode_digits():
+    # the offset keeps the digits it was written with
+    s = u"2011-11-21 10:21:36 +\u0661\u0660:\u0660\u0660"
+    r = parse.parse("{:ti}", s)[0]
+    assert r.utcoffset().total_seconds() == 10 * 60 * 60
+    assert r.tzname() == u"+\u0661\u0660:\u0660\u0660"
+
+
 def test_datetime_group_count():
     # test we increment the group count correctly for datetimes
     r = parse.parse("{:ti} {}", "1972-01-01 spam")
@@ -734,9 +816,8 @@ def test_mixed_type_variant():
 def test_too_many_fields():
     # Python 3.5 removed the limit of 100 named groups in a regular expression,
     # so only test for the exception if the limit exists.
-    p = parse.compile("{:ti}" * 15)
     with pytest.raises(parse.TooManyFields):
-        p.parse("")
+        parse.compile("{:ti}" * 15)
 
 
 def test_letters():
@@ -783,3 +864,87 @@ def test_hyphen_inside_field_name_collision_handling():
     assert result["user-id"] == "1"
     assert result["user_id"] == "2"
     assert result["user.id"] == "3"
+
+
+def test_regex_backend(monkeypatch):
+    regex = pytest.importorskip("regex")
+    monkeypatch.setattr(parse, "_regex_backend", regex)
+    # built directly so it isn't left in the cache for the tests that follow
+    p = parse.Parser("{:d} {name:w} {when:ti}")
+    r = p.parse("42 spam 2012-09-17")
+    assert r.fixed == (42,)
+    assert r.named == {"name": "spam", "when": datetime(2012, 9, 17)}
+    assert isinstance(p._match_re, regex.Pattern)
+
+    # regex counts negative positions from the end of the string
+    p = parse.Parser("ERROR {:d}")
+    assert p.search("ERROR 1 ERROR 2", endpos=-2)[0] == 1
+    assert p.search("ERROR 1 ERROR 2", pos=-7)[0] == 2
+    assert [r[0] for r in p.findall("ERROR 1 ERROR 2", endpos=-2)] == [1]
+
+
+@pytest.mark.skipif(
+    sys.version_info[0] < 3, reason="Python 2 str patterns are always ASCII"
+)
+def test_regex_backend_ascii_only(monkeypatch):
+    regex = pytest.importorskip("regex")
+    monkeypatch.setattr(parse, "_regex_backend", regex)
+    p = parse.Parser("{:w}", ascii_only=True)
+    assert not p._match_re.flags & regex.V1
+    assert p.parse("café") is None
+    assert parse.Parser("café {}", ascii_only=True).parse("CAFÉ x")[0] == "x"
+    assert parse.Parser("straße {}").parse("STRASSE x") is None
+
+
+def test_parser_cache():
+    parse._parser_cache.clear()
+    assert parse.parse("{:d} cached", "1 cached")[0] == 1
+    assert parse.search("{:d} cached", "x 2 cached")[0] == 2
+    assert len(parse._parser_cache) == 1
+    # case sensitivity is part of the key
+    assert parse.parse("{:d} CACHED", "1 cached", case_sensitive=True) is None
+    assert len(parse._parser_cache) == 2
+    assert parse.compile("{:d} cached") is parse.compile("{:d} cached")
+    parse.purge()
+    assert not parse._parser_cache
+
+
+def test_precompile():
+    parse.purge()
+    parsers = parse.precompile({"a": "{:d} a", "b": "{:d} b"}, case_sensitive=True)
+    assert parsers["a"].parse("1 a")[0] == 1
+    assert parsers["b"] is parse.compile("{:d} b", case_sensitive=True)
+
+
+def test_parse_many():
+    lines = ["a: 1", "b: x", "c: 3"]
+    assert [r.fixed for r in parse.parse_many("{}: {:d}", lines)] == [
+        ("a", 1),
+        ("c", 3),
+    ]
+    m = next(parse.parse_many("{}: {:d}", lines, evaluate_result=False))
+    assert m.evaluate_result()[1] == 1
+    # a bad format raises straight away, as with compile()
+    with pytest.raises(ValueError):
+        parse.parse_many("{:zz}", lines)
+
+
+def test_parser_cache_drops_least_recently_used(monkeypatch):
+    monkeypatch.setattr(parse, "_MAXCACHE", 2)
+    parse.purge()
+    a = parse.compile("a {}")
+    parse.compile("b {}")
+    assert parse.compile("a {}") is a
+    parse.compile("c {}")
+    assert [k[0] for k in parse._parser_cache] == ["a {}", "c {}"]
+
+
+def test_parser_cache_unhashable_type():
+    class Shouty(object):
+        __hash__ = None
+
+        def __call__(self, text):
+            return text.upper()
+
+    r = parse.parse("{:shouty}", "hello", extra_types={"shouty": Shouty()})
+    assert r[0] == "HELLO"
@@ -1,3 +1,5 @@
+import sys
+
 import pytest
 
 import parse
@@ -94,3 +96,92 @@ def test_dot_separated_fields_name_collisions():
 def test_invalid_groupnames_are_handled_gracefully():
     with pytest.raises(NotImplementedError):
         parse.parse("{hello['world']}", "doesn't work")
+    # raised when the Parser is built, rather than by its first search()
+    with pytest.raises(NotImplementedError):
+        parse.compile("{hello['world']}")
+    with pytest.raises(NotImplementedError):
+        parse.search("{hello['world']}", "doesn't work")
+
+
+def test_invalid_strftime_spec_is_handled_gracefully():
+    # the strftime pattern is compiled to count its groups, which must fail
+    # the same way as the whole expression
+    with pytest.raises(NotImplementedError):
+        parse.compile("{:%Y(}")
+    with pytest.raises(NotImplementedError):
+        parse.parse("{:%Y(}", "2020(")
+    with pytest.raises(NotImplementedError):
+        parse.search("{:%Y(}", "2020(")
+
+
+def test_prefilter():
+    def _(fmt, prefilter, **kw):
+        assert parse.Parser(fmt, **kw)._prefilter == prefilter
+
+    _("{}", "")
+    _("{{hello}} {}", "{hello} ", case_sensitive=True)
+    _("Answer: {:d}!", ": ", case_sensitive=False)
+    _("Answer: {:d}!", "Answer: ", case_sensitive=True)
+    _("{a} -- {b} ~~~ {c}", " ~~~ ")
+
+
+def test_prefilter_skips_lone_braces():
+    # a lone brace isn't escaped, so the text around it may not match itself
+    assert parse.parse("a{1,2}", "aa") is not None
+    assert parse.search("x{1,2}y {}", "xxy z")[0] == "z"
+    p = parse.Parser("x{1,2}y {} end", case_sensitive=True)
+    assert (p._prefilter, p._prefix, p._suffix) == (" end", "", " end")
+
+
+def test_prefilter_rejects():
+    assert parse.parse("[{}] ERROR {}", "[x] WARNING y") is None
+    assert parse.search("ERROR {:d}", "ERROR 1", pos=1) is None
+    if parse.Parser("ERROR {:d}")._clamp_positions:
+        # re clamps negative positions to zero (the regex module counts them
+        # from the end, see test_regex_backend)
+        assert parse.search("ERROR {:d}", "ERROR 1 ERROR 2", endpos=-4) is None
+        assert parse.search("ERROR {:d}", "ERROR 1 ERROR 2", pos=-3)[0] == 1
+    assert parse.parse("Answer: {:d}", "answer: 42")[0] == 42
+    assert list(parse.findall("{:d} ERROR", "1 WARN 2 WARN")) == []
+    assert list(parse.findall("{:d} ERROR", "1 ERROR 2 ERROR", endpos=5)) == []
+
+
+def test_prefix_and_suffix():
+    def _(fmt, prefix, suffix, **kw):
+        p = parse.Parser(fmt, **kw)
+        assert (p._prefix, p._suffix) == (prefix, suffix)
+
+    _("{}", "", "")
+    _("[{}] {}!", "[", "!")
+    _("It's {}, I love it!", "It's ", ", I love it!", case_sensitive=True)
+    _("It's {}, I love it!", "", "!")
+    _("{{{}}}", "{", "}")
+    assert parse.parse("[{}]", "x[a]") is None
+    assert parse.parse("[{}]", "[a]x") is None
+    assert parse.parse("It's {}!", "IT'S SPAM!")[0] == "SPAM"
+    # cased text either side of the fields isn't checked case insensitively
+    assert parse.parse("Id {}", "ID 5")[0] == "5"
+    assert parse.parse("{} Ms", "5 MS")[0] == "5"
+
+
+@pytest.mark.skipif(
+    sys.version_info[0] < 3, reason="Python 2 str patterns only fold ASCII case"
+)
+def test_prefix_and_suffix_cased_symbols():
+    # circled letters are cased symbols rather than letters
+    p = parse.Parser(u"\u24d0 {} \u24d0")
+    assert (p._prefix, p._suffix) == ("", "")
+    assert parse.parse(u"\u24d0 {}", u"\u24b6 5")[0] == "5"
+    assert parse.parse(u"{} \u24d0", u"5 \u24b6")[0] == "5"
+
+
+def test_non_string_raises_type_error():
+    # the quick literal checks leave rejecting other types to the regex
+    for fmt in ("{}", "ERROR {}", "[{}] ERROR"):
+        p = parse.Parser(fmt)
+        with pytest.raises(TypeError):
+            p.parse(None)
+        with pytest.raises(TypeError):
+            p.search(None, endpos=5)
+        with pytest.raises(TypeError):
+            p.findall(None, endpos=5)
@@ -1,3 +1,5 @@
+import pickle
+
 import pytest
 
 import parse
@@ -36,3 +38,27 @@ def test_contains():
     assert "spam" in r
     assert "cat" not in r
     assert "ham" not in r
+
+
+def test_pickle():
+    r = parse.parse("{} {name}", "cat dog")
+    for protocol in range(pickle.HIGHEST_PROTOCOL + 1):
+        r2 = pickle.loads(pickle.dumps(r, protocol))
+        assert r2.fixed == ("cat",)
+        assert r2.named == {"name": "dog"}
+        assert r2.spans == r.spans
+
+
+def test_unpickle_from_1_20():
+    # a Result from parse("{} {n:d}", "a 1") pickled by parse 1.20.2, before
+    # Result had slots
+    data = (
+        b"\x80\x02cparse\nResult\nq\x00)\x81q\x01}q\x02(X\x05\x00\x00\x00fixedq"
+        b"\x03X\x01\x00\x00\x00aq\x04\x85q\x05X\x05\x00\x00\x00namedq\x06}q\x07X"
+        b"\x01\x00\x00\x00nq\x08K\x01sX\x05\x00\x00\x00spansq\t}q\n(h\x08K\x02K"
+        b"\x03\x86q\x0bK\x00K\x00K\x01\x86q\x0cuub."
+    )
+    r = pickle.loads(data)
+    assert r.fixed == ("a",)
+    assert r.named == {"n": 1}
+    assert r.spans == {0: (0, 1), "n": (2, 3)}